@@ -10,6 +10,7 @@ FIXED: Plot generator data structure bug - accessing top-level HRV metrics.
 
 import os
 import json
+import base64
 import logging
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Union
@@ -26,7 +27,6 @@ from hrv_metrics import calculate_hrv_metrics
 from plot_generator import generate_hrv_plot
 from hrv_plots_manager import HRVPlotsManager
 import jwt
-from supabase import create_client, Client
 
 # Configure logging
 logging.basicConfig(
@@ -160,7 +160,8 @@ def validate_session_data(data: Dict) -> Dict[str, str]:
     
     # Validate recorded_at timestamp
     try:
-        datetime.fromisoformat(data['recorded_at'].replace('Z', '+00:00'))
+        # Python 3.11+ (runtime.txt) parses a trailing 'Z' natively
+        datetime.fromisoformat(data['recorded_at'])
     except (ValueError, TypeError):
         errors['recorded_at'] = "Invalid timestamp format. Use ISO8601 format"
     
@@ -214,11 +215,11 @@ def get_sessions_data_for_plot(user_id: str, tag: str):
                 """,
                 (user_id, tag)
             )
-            raw_sessions = cursor.fetchall()
-            
-            # Convert to same format as processed sessions endpoint (nested hrv_metrics)
+            # Convert to same format as processed sessions endpoint (nested hrv_metrics),
+            # iterating the cursor so rows are converted one at a time instead of
+            # first materializing a list of RealDictRows
             sessions_data = []
-            for row in raw_sessions:
+            for row in cursor:
                 session_dict = {
                     'session_id': row['session_id'],
                     'tag': row['tag'],
@@ -263,7 +264,7 @@ def get_sessions_data_for_plot(user_id: str, tag: str):
                     """,
                     (user_id,)
                 )
-                sleep_events_data = [dict(row) for row in cursor.fetchall()]
+                sleep_events_data = [dict(row) for row in cursor]
             
             return sessions_data, sleep_events_data
             
@@ -379,12 +380,12 @@ def upload_session():
             insert_query = """
                 INSERT INTO public.sessions (
                     session_id, user_id, tag, subtag, event_id,
-                    duration_minutes, recorded_at, rr_intervals, rr_count,
+                    duration_minutes, recorded_at, rr_intervals,
                     status, processed_at,
                     mean_hr, mean_rr, count_rr, rmssd, sdnn, pnn50, cv_rr, defa, sd2_sd1
                 ) VALUES (
                     %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s,
+                    %s, %s, %s,
                     %s, %s,
                     %s, %s, %s, %s, %s, %s, %s, %s, %s
                 )
@@ -398,8 +399,7 @@ def upload_session():
                 data['event_id'],
                 data['duration_minutes'],
                 data['recorded_at'],
-                data['rr_intervals'],  # PostgreSQL DECIMAL[] array
-                len(data['rr_intervals']),
+                data['rr_intervals'],  # PostgreSQL DECIMAL[] array (rr_count is generated from it)
                 'completed',  # Mark as completed since we processed it
                 datetime.now(timezone.utc),
                 hrv_metrics['mean_hr'],
@@ -762,7 +762,7 @@ def get_hrv_trend_plot():
             # Return existing plot from database
             return jsonify({
                 'success': True,
-                'plot_data': plot_data['plot_image_base64'],
+                'plot_data': base64.b64encode(plot_data['plot_image']).decode('ascii'),
                 'metadata': plot_data['plot_metadata'],
                 'cached': True,
                 'last_updated': plot_data['updated_at'].isoformat() if plot_data['updated_at'] else None
@@ -895,20 +895,11 @@ def debug_sessions_data(user_id: str, tag: str):
                     """,
                     (user_id, tag)
                 )
-                all_sessions = [dict(row) for row in cursor.fetchall()]
+                all_sessions = [dict(row) for row in cursor]
                 
-                # Check sessions with mean_hr filter
-                cursor.execute(
-                    """
-                    SELECT session_id, tag, subtag, recorded_at, duration_minutes,
-                           mean_hr, mean_rr, count_rr, rmssd, sdnn, pnn50, cv_rr, defa, sd2_sd1
-                    FROM public.sessions 
-                    WHERE user_id = %s AND tag = %s AND mean_hr IS NOT NULL
-                    ORDER BY recorded_at ASC
-                    """,
-                    (user_id, tag)
-                )
-                filtered_sessions = [dict(row) for row in cursor.fetchall()]
+                # Sessions that pass the mean_hr filter, taken from the rows above
+                # rather than a second scan of the same user/tag
+                filtered_sessions = [session for session in all_sessions if session['mean_hr'] is not None]
                 
                 return jsonify({
                     'user_id': user_id,
@@ -961,7 +952,7 @@ def get_user_plots(user_id: str):
             
             organized_plots[tag][metric] = {
                 'plot_id': plot['plot_id'],
-                'plot_image_base64': plot['plot_image_base64'],
+                'plot_image_base64': base64.b64encode(plot['plot_image']).decode('ascii'),
                 'metadata': plot['plot_metadata'],
                 'data_points_count': plot['data_points_count'],
                 'last_updated': plot['updated_at'].isoformat() if plot['updated_at'] else None
@@ -1017,7 +1008,9 @@ def debug_refresh_plots_for_tag(user_id: str, tag: str):
         # Step 0: Validate database table exists
         try:
             conn = hrv_plots_manager.connection_pool.getconn()
-            cur = conn.cursor()
+            # Plain tuple cursor (the pool defaults to RealDictCursor); the
+            # positional column access below needs tuples, not per-row dicts
+            cur = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
             cur.execute("""
                 SELECT column_name, data_type, is_nullable 
                 FROM information_schema.columns 
@@ -1087,7 +1080,7 @@ def debug_refresh_plots_for_tag(user_id: str, tag: str):
                     user_id=user_id,
                     tag=tag,
                     metric='rmssd',
-                    plot_image_base64=test_result['plot_data'],
+                    plot_image_png=base64.b64decode(test_result['plot_data']),
                     plot_metadata=test_result['metadata'],
                     data_points_count=test_result['metadata'].get('data_points', 0),
                     date_range_start=None,
@@ -1207,7 +1200,7 @@ def refresh_plots_final(user_id: str, tag: str):
                         user_id=user_id,
                         tag=tag,
                         metric=metric,
-                        plot_image_base64=plot_data,
+                        plot_image_png=base64.b64decode(plot_data),
                         plot_metadata=plot_result['metadata'],
                         data_points_count=plot_result['metadata'].get('data_points', 0),
                         date_range_start=None,
@@ -1295,7 +1288,7 @@ def refresh_plots_simple(user_id: str, tag: str):
                     user_id=user_id,
                     tag=tag,
                     metric=metric,
-                    plot_image_base64=plot_result['plot_data'],
+                    plot_image_png=base64.b64decode(plot_result['plot_data']),
                     plot_metadata=plot_result['metadata'],
                     data_points_count=plot_result['metadata'].get('data_points', 0),
                     date_range_start=None,
@@ -1395,7 +1388,7 @@ def refresh_plots_sequential(user_id: str, tag: str):
                         user_id=user_id,
                         tag=tag,
                         metric=metric,
-                        plot_image_base64=plot_result['plot_data'],
+                        plot_image_png=base64.b64decode(plot_result['plot_data']),
                         plot_metadata=plot_result['metadata'],
                         data_points_count=plot_result['metadata'].get('data_points', 0),
                         date_range_start=None,
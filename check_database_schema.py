@@ -5,11 +5,16 @@ Analyzes current database state and identifies any issues
 """
 
 import os
+import base64
 import psycopg2
-from psycopg2.extras import RealDictCursor
 from database_config import DatabaseConfig
 import json
 
+def rows_as_dicts(cur):
+    """Map the rows of a plain tuple cursor to dicts, reading column names once"""
+    names = [desc[0] for desc in cur.description]
+    return [dict(zip(names, row)) for row in cur.fetchall()]
+
 def check_database_schema():
     """Comprehensive check of database schema and connectivity"""
     
@@ -38,35 +43,43 @@ def check_database_schema():
             database=db_config.database,
             user=db_config.user,
             password=db_config.password,
-            port=db_config.port,
-            cursor_factory=RealDictCursor
+            port=db_config.port
         )
         
         cur = conn.cursor()
         results['connection'] = {'success': True, 'message': 'Connection successful'}
         print("✅ Database connection successful")
         
-        # Check hrv_plots table exists
-        print("\n📋 Checking hrv_plots table...")
+        # Fetch table, column, RLS and function metadata in one round-trip
+        # (rls_enabled is NULL when the table does not exist)
         cur.execute("""
-            SELECT table_name FROM information_schema.tables 
-            WHERE table_schema = 'public' AND table_name = 'hrv_plots'
+            SELECT
+                (SELECT relrowsecurity FROM pg_class
+                 WHERE relnamespace = 'public'::regnamespace AND relkind = 'r' AND relname = 'hrv_plots') AS rls_enabled,
+                (SELECT COALESCE(json_agg(json_build_object(
+                            'column_name', column_name, 'data_type', data_type,
+                            'is_nullable', is_nullable, 'column_default', column_default
+                        ) ORDER BY ordinal_position), '[]'::json)
+                 FROM information_schema.columns
+                 WHERE table_name = 'hrv_plots' AND table_schema = 'public') AS columns,
+                (SELECT COALESCE(json_agg(json_build_object(
+                            'routine_name', proname::text,
+                            'routine_type', CASE prokind WHEN 'p' THEN 'PROCEDURE' ELSE 'FUNCTION' END
+                        )), '[]'::json)
+                 FROM pg_proc
+                 WHERE pronamespace = 'public'::regnamespace
+                 AND proname IN ('get_user_hrv_plots', 'upsert_hrv_plot')) AS functions
         """)
-        table_exists = cur.fetchone()
+        rls_enabled, columns, functions = cur.fetchone()
         
-        if table_exists:
+        # Check hrv_plots table exists
+        print("\n📋 Checking hrv_plots table...")
+        if rls_enabled is not None:
             print("✅ hrv_plots table exists")
             results['tables']['hrv_plots_exists'] = True
             
-            # Get table schema
-            cur.execute("""
-                SELECT column_name, data_type, is_nullable, column_default
-                FROM information_schema.columns 
-                WHERE table_name = 'hrv_plots' AND table_schema = 'public'
-                ORDER BY ordinal_position
-            """)
-            columns = cur.fetchall()
-            results['tables']['columns'] = [dict(col) for col in columns]
+            # Table schema
+            results['tables']['columns'] = columns
             
             print(f"   Columns ({len(columns)}):")
             for col in columns:
@@ -77,25 +90,13 @@ def check_database_schema():
         
         # Check RLS is enabled
         print("\n🔒 Checking Row Level Security...")
-        cur.execute("""
-            SELECT tablename, rowsecurity FROM pg_tables 
-            WHERE schemaname = 'public' AND tablename = 'hrv_plots'
-        """)
-        rls_info = cur.fetchone()
-        if rls_info:
-            rls_enabled = rls_info['rowsecurity']
+        if rls_enabled is not None:
             results['tables']['rls_enabled'] = rls_enabled
             print(f"   RLS enabled: {rls_enabled}")
         
         # Check functions exist
         print("\n⚙️ Checking database functions...")
-        cur.execute("""
-            SELECT routine_name, routine_type FROM information_schema.routines 
-            WHERE routine_schema = 'public' 
-            AND routine_name IN ('get_user_hrv_plots', 'upsert_hrv_plot')
-        """)
-        functions = cur.fetchall()
-        results['functions']['available'] = [dict(func) for func in functions]
+        results['functions']['available'] = functions
         
         for func in functions:
             print(f"✅ Function {func['routine_name']} exists ({func['routine_type']})")
@@ -104,73 +105,82 @@ def check_database_schema():
             missing_funcs = set(['get_user_hrv_plots', 'upsert_hrv_plot']) - set([f['routine_name'] for f in functions])
             print(f"❌ Missing functions: {missing_funcs}")
         
-        # Test upsert function with actual data
-        print("\n🧪 Testing upsert function...")
-        test_user_id = '7015839c-4659-4b6c-821c-2906e710a2db'
-        test_metadata = {'test': True, 'data_points': 5, 'date_range': '2024-01-01 to 2024-01-02'}
+        # Table existence was resolved by the metadata query above; without the
+        # table the write test and plot listing can only fail, so skip them
+        if not results['tables']['hrv_plots_exists']:
+            print("\n⏭️ Skipping upsert test and plot listing (hrv_plots table missing)")
+            results['test_operations']['existing_plots'] = []
+        else:
+            # Test upsert function with actual data
+            print("\n🧪 Testing upsert function...")
+            test_user_id = '7015839c-4659-4b6c-821c-2906e710a2db'
+            test_metadata = {'test': True, 'data_points': 5, 'date_range': '2024-01-01 to 2024-01-02'}
         
-        try:
-            cur.execute("""
-                SELECT upsert_hrv_plot(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                test_user_id, 'test_schema_check', 'rmssd', 
-                'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8/5+hHgAHggJ/PchI7wAAAABJRU5ErkJggg==',  # 1x1 pixel PNG
-                json.dumps(test_metadata),
-                5, None, None, 50.0, 10.0, 30.0, 70.0, 40.0, 60.0
-            ))
-            test_plot_id = cur.fetchone()[0]
-            conn.commit()
+            try:
+                cur.execute("""
+                    SELECT upsert_hrv_plot(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    test_user_id, 'test_schema_check', 'rmssd', 
+                    psycopg2.Binary(base64.b64decode('iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8/5+hHgAHggJ/PchI7wAAAABJRU5ErkJggg==')),  # 1x1 pixel PNG
+                    json.dumps(test_metadata),
+                    5, None, None, 50.0, 10.0, 30.0, 70.0, 40.0, 60.0
+                ))
+                test_plot_id = cur.fetchone()[0]
+                conn.commit()
             
-            if test_plot_id:
-                print(f"✅ Upsert function test successful - plot_id: {test_plot_id}")
-                results['test_operations']['upsert'] = {'success': True, 'plot_id': str(test_plot_id)}
+                if test_plot_id:
+                    print(f"✅ Upsert function test successful - plot_id: {test_plot_id}")
+                    results['test_operations']['upsert'] = {'success': True, 'plot_id': str(test_plot_id)}
                 
-                # Test retrieval
-                cur.execute("""
-                    SELECT plot_id, tag, metric, data_points_count, stat_mean 
-                    FROM public.hrv_plots 
-                    WHERE user_id = %s AND tag = 'test_schema_check'
-                """, (test_user_id,))
-                retrieved_plot = cur.fetchone()
+                    # Test retrieval
+                    cur.execute("""
+                        SELECT plot_id, tag, metric, data_points_count, stat_mean 
+                        FROM public.hrv_plots 
+                        WHERE user_id = %s AND tag = 'test_schema_check'
+                    """, (test_user_id,))
+                    retrieved_rows = rows_as_dicts(cur)
+                    retrieved_plot = retrieved_rows[0] if retrieved_rows else None
                 
-                if retrieved_plot:
-                    print(f"✅ Plot retrieval successful - found plot with {retrieved_plot['data_points_count']} data points")
-                    results['test_operations']['retrieval'] = {'success': True, 'data': dict(retrieved_plot)}
-                else:
-                    print("❌ Plot retrieval failed")
-                    results['test_operations']['retrieval'] = {'success': False}
+                    if retrieved_plot:
+                        print(f"✅ Plot retrieval successful - found plot with {retrieved_plot['data_points_count']} data points")
+                        results['test_operations']['retrieval'] = {'success': True, 'data': retrieved_plot}
+                    else:
+                        print("❌ Plot retrieval failed")
+                        results['test_operations']['retrieval'] = {'success': False}
                 
-                # Clean up test data
-                cur.execute("DELETE FROM public.hrv_plots WHERE user_id = %s AND tag = 'test_schema_check'", (test_user_id,))
-                conn.commit()
-                print("🧹 Test data cleaned up")
+                    # Clean up test data
+                    cur.execute("DELETE FROM public.hrv_plots WHERE user_id = %s AND tag = 'test_schema_check'", (test_user_id,))
+                    conn.commit()
+                    print("🧹 Test data cleaned up")
                 
-            else:
-                print("❌ Upsert function returned NULL")
-                results['test_operations']['upsert'] = {'success': False, 'error': 'NULL return'}
+                else:
+                    print("❌ Upsert function returned NULL")
+                    results['test_operations']['upsert'] = {'success': False, 'error': 'NULL return'}
                 
-        except Exception as e:
-            print(f"❌ Upsert function test failed: {e}")
-            results['test_operations']['upsert'] = {'success': False, 'error': str(e)}
-        
-        # Check existing plots for the test user
-        print(f"\n📊 Checking existing plots for user {test_user_id}...")
-        cur.execute("""
-            SELECT tag, metric, data_points_count, created_at 
-            FROM public.hrv_plots 
-            WHERE user_id = %s 
-            ORDER BY created_at DESC
-        """, (test_user_id,))
-        existing_plots = cur.fetchall()
-        
-        if existing_plots:
-            print(f"   Found {len(existing_plots)} existing plots:")
-            for plot in existing_plots:
-                print(f"     - {plot['tag']}/{plot['metric']}: {plot['data_points_count']} points ({plot['created_at']})")
-            results['test_operations']['existing_plots'] = [dict(plot) for plot in existing_plots]
-        else:
-            print("   No existing plots found")
-            results['test_operations']['existing_plots'] = []
+            except Exception as e:
+                print(f"❌ Upsert function test failed: {e}")
+                results['test_operations']['upsert'] = {'success': False, 'error': str(e)}
+                # Clear the aborted transaction so the plot listing below can run
+                conn.rollback()
+        
+            # Check existing plots for the test user
+            print(f"\n📊 Checking existing plots for user {test_user_id}...")
+            cur.execute("""
+                SELECT tag, metric, data_points_count, created_at 
+                FROM public.hrv_plots 
+                WHERE user_id = %s 
+                ORDER BY created_at DESC
+            """, (test_user_id,))
+            existing_plots = rows_as_dicts(cur)
+        
+            if existing_plots:
+                print(f"   Found {len(existing_plots)} existing plots:")
+                for plot in existing_plots:
+                    print(f"     - {plot['tag']}/{plot['metric']}: {plot['data_points_count']} points ({plot['created_at']})")
+                results['test_operations']['existing_plots'] = existing_plots
+            else:
+                print("   No existing plots found")
+                results['test_operations']['existing_plots'] = []
         
         print("\n🎉 Database schema check completed successfully!")
         
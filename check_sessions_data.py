@@ -6,7 +6,11 @@ Uses same approach as test_db_connection.py to analyze session upload and plot g
 
 import os
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import sql
+
+# Tables with a planner estimate at or above this are reported from pg_class
+# statistics instead of a full COUNT(*) scan
+EXACT_COUNT_THRESHOLD = 10000
 
 def load_env_file():
     """Manually load environment variables from .env.railway"""
@@ -23,6 +27,20 @@ def load_env_file():
         print(f"Error loading .env.railway: {e}")
     return env_vars
 
+def get_row_count(cursor, table_name, estimates):
+    """
+    Row count for a public table, and whether it is an estimate
+    
+    Uses pg_class.reltuples for large tables. Small tables, and tables that
+    have never been analyzed (reltuples = -1), are counted exactly so that an
+    empty table is never reported from stale statistics.
+    """
+    estimate = estimates.get(table_name, -1)
+    if estimate >= EXACT_COUNT_THRESHOLD:
+        return estimate, True
+    cursor.execute(sql.SQL('SELECT COUNT(*) FROM {};').format(sql.Identifier('public', table_name)))
+    return cursor.fetchone()[0], False
+
 def check_sessions_data():
     """Check sessions data and plot generation status"""
     
@@ -56,19 +74,25 @@ def check_sessions_data():
             port=port,
             database=database,
             user=user,
-            password=password,
-            cursor_factory=RealDictCursor
+            password=password
         )
         print("✅ Connection successful!")
         
         cursor = conn.cursor()
         
+        # Planner row estimates for both tables in one catalog lookup
+        cursor.execute("""
+            SELECT relname::text, reltuples::bigint
+            FROM pg_class
+            WHERE relnamespace = 'public'::regnamespace AND relkind = 'r'
+              AND relname IN ('sessions', 'hrv_plots');
+        """)
+        estimates = dict(cursor.fetchall())
+        
         # Check total sessions
         print("\n📊 Checking sessions data...")
-        cursor.execute('SELECT COUNT(*) FROM public.sessions;')
-        result = cursor.fetchone()
-        total_sessions = result['count'] if result else 0
-        print(f"   Total sessions in database: {total_sessions}")
+        total_sessions, is_estimate = get_row_count(cursor, 'sessions', estimates)
+        print(f"   Total sessions in database: {'≈' if is_estimate else ''}{total_sessions}")
         
         if total_sessions > 0:
             # Check recent sessions
@@ -124,13 +148,12 @@ def check_sessions_data():
         
         # Check hrv_plots table
         print("\n📈 Checking hrv_plots table...")
-        cursor.execute('SELECT COUNT(*) FROM public.hrv_plots;')
-        total_plots = cursor.fetchone()[0]
-        print(f"   Total plots in database: {total_plots}")
+        total_plots, is_estimate = get_row_count(cursor, 'hrv_plots', estimates)
+        print(f"   Total plots in database: {'≈' if is_estimate else ''}{total_plots}")
         
         if total_plots > 0:
             cursor.execute("""
-                SELECT user_id, tag, metric, created_at, LENGTH(plot_data) as data_size
+                SELECT user_id, tag, metric, created_at, OCTET_LENGTH(plot_image) as data_size
                 FROM public.hrv_plots 
                 ORDER BY created_at DESC 
                 LIMIT 5;
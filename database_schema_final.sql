@@ -66,7 +66,7 @@ CREATE TABLE IF NOT EXISTS public.sessions (
     
     -- Raw data
     rr_intervals DECIMAL[] NOT NULL,    -- Array of RR intervals in milliseconds
-    rr_count INTEGER NOT NULL,
+    rr_count INTEGER GENERATED ALWAYS AS (array_length(rr_intervals, 1)) STORED NOT NULL,
     
     -- Processing status
     status VARCHAR(20) DEFAULT 'uploaded' CHECK (status IN ('uploaded', 'processing', 'completed', 'failed')),
@@ -119,15 +119,25 @@ CREATE POLICY "Users can delete own sessions" ON public.sessions
 -- =============================================================================
 
 -- Primary performance indexes
-CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON public.sessions(user_id);
 CREATE INDEX IF NOT EXISTS idx_sessions_user_tag ON public.sessions(user_id, tag);
 CREATE INDEX IF NOT EXISTS idx_sessions_event_id ON public.sessions(event_id) WHERE event_id > 0;
 CREATE INDEX IF NOT EXISTS idx_sessions_status ON public.sessions(status);
-CREATE INDEX IF NOT EXISTS idx_sessions_recorded_at ON public.sessions(recorded_at);
 
 -- Composite indexes for common queries
 CREATE INDEX IF NOT EXISTS idx_sessions_user_event ON public.sessions(user_id, event_id) WHERE event_id > 0;
 CREATE INDEX IF NOT EXISTS idx_sessions_tag_status ON public.sessions(tag, status);
+CREATE INDEX IF NOT EXISTS idx_sessions_user_time ON public.sessions(user_id, recorded_at);
+
+-- Superseded: idx_sessions_user_time covers user_id-only lookups and the BRIN
+-- index below covers recorded_at range scans
+DROP INDEX IF EXISTS idx_sessions_user_id;
+DROP INDEX IF EXISTS idx_sessions_recorded_at;
+
+-- Block-range index for bulk time-series scans (append-only recorded_at)
+CREATE INDEX IF NOT EXISTS idx_sessions_recorded_at_brin ON public.sessions USING BRIN (recorded_at) WITH (pages_per_range = 32);
+
+-- Rest baseline listing (per-user rest sessions in time order)
+CREATE INDEX IF NOT EXISTS idx_sessions_rest_user_time ON public.sessions(user_id, recorded_at) WHERE tag = 'rest';
 
 -- HRV metrics performance index (added in v4.1.0)
 CREATE INDEX IF NOT EXISTS idx_sessions_hrv_metrics 
@@ -137,6 +147,9 @@ WHERE mean_hr IS NOT NULL;
 -- Sleep event index (for legacy support)
 CREATE INDEX IF NOT EXISTS idx_sessions_sleep_event ON public.sessions(sleep_event_id) WHERE sleep_event_id IS NOT NULL;
 
+-- Sleep event listing (latest event_ids per user, newest first)
+CREATE INDEX IF NOT EXISTS idx_sessions_sleep_events ON public.sessions(user_id, event_id DESC) WHERE tag = 'sleep' AND event_id > 0;
+
 -- =============================================================================
 -- 5. DATABASE FUNCTIONS (API Support)
 -- =============================================================================
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Deploy Generated rr_count Column to Production Database
+Turns public.sessions.rr_count into a column derived from rr_intervals
+
+Neither API version works against the other schema: the old app.py inserts
+rr_count explicitly (rejected by a generated column) and the new one omits it
+(rejected by the old NOT NULL column). Run this inside a maintenance window
+with the API stopped, then deploy the new app.py before restarting. The
+migration rewrites the sessions table under an exclusive lock. It is
+idempotent and does nothing once rr_count is already generated.
+"""
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from database_config import DatabaseConfig
+
+MIGRATION_SQL = """
+-- Fail fast instead of queueing behind live traffic (and blocking it)
+SET LOCAL lock_timeout = '5s';
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 'public'
+          AND table_name = 'sessions'
+          AND column_name = 'rr_count'
+          AND is_generated = 'NEVER'
+    ) THEN
+        ALTER TABLE public.sessions DROP COLUMN rr_count;
+        ALTER TABLE public.sessions
+            ADD COLUMN rr_count INTEGER GENERATED ALWAYS AS (array_length(rr_intervals, 1)) STORED NOT NULL;
+        ALTER TABLE public.sessions
+            ADD CONSTRAINT valid_rr_count CHECK (rr_count > 0);
+    END IF;
+END $$;
+"""
+
+def deploy_generated_rr_count():
+    """Deploy the generated rr_count column to production database"""
+
+    conn = None
+    try:
+        # Initialize database configuration
+        db_config = DatabaseConfig()
+
+        # Connect to database
+        conn = psycopg2.connect(
+            host=db_config.host,
+            database=db_config.database,
+            user=db_config.user,
+            password=db_config.password,
+            port=db_config.port,
+            cursor_factory=RealDictCursor
+        )
+
+        cur = conn.cursor()
+
+        print("🚀 Deploying generated rr_count column...")
+
+        cur.execute(MIGRATION_SQL)
+
+        # Verify the column inside the same transaction before committing
+        cur.execute("""
+            SELECT column_name, is_generated, generation_expression
+            FROM information_schema.columns
+            WHERE table_name = 'sessions'
+              AND table_schema = 'public'
+              AND column_name = 'rr_count';
+        """)
+        column = cur.fetchone()
+
+        if not column or column['is_generated'] != 'ALWAYS':
+            raise RuntimeError("sessions.rr_count is not a generated column")
+
+        conn.commit()
+
+        print(f"✅ rr_count is generated: {column['generation_expression']}")
+        print("🎉 Generated rr_count deployment completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Generated rr_count deployment failed: {e}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    deploy_generated_rr_count()
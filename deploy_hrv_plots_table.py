@@ -20,7 +20,7 @@ def deploy_hrv_plots_schema():
         user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
         tag VARCHAR(50) NOT NULL,
         metric VARCHAR(20) NOT NULL,
-        plot_image_base64 TEXT NOT NULL,
+        plot_image BYTEA NOT NULL,
         plot_metadata JSONB,
         data_points_count INTEGER DEFAULT 0,
         date_range_start TIMESTAMP WITH TIME ZONE,
@@ -44,13 +44,32 @@ def deploy_hrv_plots_schema():
     CREATE POLICY "Users can manage their own plots" ON public.hrv_plots
         FOR ALL USING (auth.uid() = user_id);
 
+    -- Migrate existing base64 TEXT storage to raw BYTEA (no-op on new installs)
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'hrv_plots'
+              AND column_name = 'plot_image_base64'
+        ) THEN
+            ALTER TABLE public.hrv_plots ADD COLUMN IF NOT EXISTS plot_image BYTEA;
+            UPDATE public.hrv_plots SET plot_image = decode(plot_image_base64, 'base64');
+            ALTER TABLE public.hrv_plots ALTER COLUMN plot_image SET NOT NULL;
+            ALTER TABLE public.hrv_plots DROP COLUMN plot_image_base64;
+        END IF;
+    END $$;
+
+    -- Return/argument types changed from TEXT to BYTEA, so replace rather than overload
+    DROP FUNCTION IF EXISTS get_user_hrv_plots(UUID);
+    DROP FUNCTION IF EXISTS upsert_hrv_plot(UUID, VARCHAR, VARCHAR, TEXT, JSONB, INTEGER, TIMESTAMP WITH TIME ZONE, TIMESTAMP WITH TIME ZONE, NUMERIC, NUMERIC, NUMERIC, NUMERIC, NUMERIC, NUMERIC);
+
     -- Helper function to get user plots
     CREATE OR REPLACE FUNCTION get_user_hrv_plots(p_user_id UUID)
     RETURNS TABLE(
         plot_id UUID,
         tag VARCHAR(50),
         metric VARCHAR(20),
-        plot_image_base64 TEXT,
+        plot_image BYTEA,
         plot_metadata JSONB,
         data_points_count INTEGER,
         date_range_start TIMESTAMP WITH TIME ZONE,
@@ -69,7 +88,7 @@ def deploy_hrv_plots_schema():
             hp.plot_id,
             hp.tag,
             hp.metric,
-            hp.plot_image_base64,
+            hp.plot_image,
             hp.plot_metadata,
             hp.data_points_count,
             hp.date_range_start,
@@ -92,7 +111,7 @@ def deploy_hrv_plots_schema():
         p_user_id UUID,
         p_tag VARCHAR(50),
         p_metric VARCHAR(20),
-        p_plot_image_base64 TEXT,
+        p_plot_image BYTEA,
         p_plot_metadata JSONB,
         p_data_points_count INTEGER,
         p_date_range_start TIMESTAMP WITH TIME ZONE,
@@ -109,17 +128,17 @@ def deploy_hrv_plots_schema():
         result_plot_id UUID;
     BEGIN
         INSERT INTO public.hrv_plots (
-            user_id, tag, metric, plot_image_base64, plot_metadata,
+            user_id, tag, metric, plot_image, plot_metadata,
             data_points_count, date_range_start, date_range_end,
             stat_mean, stat_std, stat_min, stat_max, stat_p10, stat_p90
         ) VALUES (
-            p_user_id, p_tag, p_metric, p_plot_image_base64, p_plot_metadata,
+            p_user_id, p_tag, p_metric, p_plot_image, p_plot_metadata,
             p_data_points_count, p_date_range_start, p_date_range_end,
             p_stat_mean, p_stat_std, p_stat_min, p_stat_max, p_stat_p10, p_stat_p90
         )
         ON CONFLICT (user_id, tag, metric)
         DO UPDATE SET
-            plot_image_base64 = EXCLUDED.plot_image_base64,
+            plot_image = EXCLUDED.plot_image,
             plot_metadata = EXCLUDED.plot_metadata,
             data_points_count = EXCLUDED.data_points_count,
             date_range_start = EXCLUDED.date_range_start,
@@ -140,7 +159,7 @@ def deploy_hrv_plots_schema():
     -- Grant necessary permissions
     GRANT SELECT, INSERT, UPDATE, DELETE ON public.hrv_plots TO authenticated;
     GRANT EXECUTE ON FUNCTION get_user_hrv_plots(UUID) TO authenticated;
-    GRANT EXECUTE ON FUNCTION upsert_hrv_plot(UUID, VARCHAR, VARCHAR, TEXT, JSONB, INTEGER, TIMESTAMP WITH TIME ZONE, TIMESTAMP WITH TIME ZONE, NUMERIC, NUMERIC, NUMERIC, NUMERIC, NUMERIC, NUMERIC) TO authenticated;
+    GRANT EXECUTE ON FUNCTION upsert_hrv_plot(UUID, VARCHAR, VARCHAR, BYTEA, JSONB, INTEGER, TIMESTAMP WITH TIME ZONE, TIMESTAMP WITH TIME ZONE, NUMERIC, NUMERIC, NUMERIC, NUMERIC, NUMERIC, NUMERIC) TO authenticated;
     """
     
     try:
@@ -161,41 +180,43 @@ def deploy_hrv_plots_schema():
         
         print("🚀 Deploying HRV plots table schema...")
         
-        # Execute schema deployment
-        cur.execute(schema_sql)
-        conn.commit()
-        
-        # Verify table was created
-        cur.execute("""
-            SELECT column_name, data_type 
-            FROM information_schema.columns 
-            WHERE table_name = 'hrv_plots' AND table_schema = 'public'
-            ORDER BY ordinal_position
+        # Execute schema deployment and verify the table in one round-trip
+        # (psycopg2 exposes the result set of the last statement). The column
+        # list is aggregated server-side into one JSON value, which psycopg2
+        # decodes into a list of dicts.
+        cur.execute(schema_sql + """
+            SELECT COALESCE(json_agg(row_to_json(c)), '[]'::json) AS columns
+            FROM (
+                SELECT column_name, data_type 
+                FROM information_schema.columns 
+                WHERE table_name = 'hrv_plots' AND table_schema = 'public'
+                ORDER BY ordinal_position
+            ) c;
         """)
-        columns = cur.fetchall()
+        columns = cur.fetchone()['columns']
+        conn.commit()
         
         print(f"✅ HRV plots table created successfully with {len(columns)} columns:")
         for col in columns:
             print(f"   - {col['column_name']}: {col['data_type']}")
         
-        # Test the upsert function
+        # Test the upsert function inside a transaction that is rolled back,
+        # so the test row never has to be committed and deleted again
         print("\n🧪 Testing upsert function...")
         test_user_id = '7015839c-4659-4b6c-821c-2906e710a2db'
-        cur.execute("""
-            SELECT upsert_hrv_plot(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            test_user_id, 'test', 'rmssd', 'test_plot_data', '{"test": true}',
-            1, None, None, 50.0, 10.0, 30.0, 70.0, 40.0, 60.0
-        ))
-        test_plot_id = cur.fetchone()[0]
-        conn.commit()
-        
+        try:
+            cur.execute("""
+                SELECT upsert_hrv_plot(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, (
+                test_user_id, 'test', 'rmssd', psycopg2.Binary(b'test_plot_data'), '{"test": true}',
+                1, None, None, 50.0, 10.0, 30.0, 70.0, 40.0, 60.0
+            ))
+            test_plot_id = cur.fetchone()['upsert_hrv_plot']
+        finally:
+            conn.rollback()
+
         print(f"✅ Upsert function test successful - plot_id: {test_plot_id}")
-        
-        # Clean up test data
-        cur.execute("DELETE FROM public.hrv_plots WHERE user_id = %s AND tag = 'test'", (test_user_id,))
-        conn.commit()
-        
+
         print("🎉 HRV plots table schema deployment completed successfully!")
         
     except Exception as e:
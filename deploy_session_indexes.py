@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Deploy Session Indexes to Production Database
+Adds the time-series indexes on public.sessions without blocking writes
+and drops the btree indexes they supersede
+"""
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from database_config import DatabaseConfig
+
+# CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so each
+# statement is executed on its own with autocommit enabled
+INDEX_STATEMENTS = [
+    # Per-user time-ordered reads: filter on user_id and return rows already
+    # sorted by recorded_at, without a separate sort step
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_user_time
+        ON public.sessions(user_id, recorded_at)
+    """,
+    # Compact block-range index for bulk scans over recorded_at (append-only)
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_recorded_at_brin
+        ON public.sessions USING BRIN (recorded_at) WITH (pages_per_range = 32)
+    """,
+    # Rest baseline listing: per-user rest sessions in time order
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_rest_user_time
+        ON public.sessions(user_id, recorded_at) WHERE tag = 'rest'
+    """,
+]
+
+# Btree indexes made redundant by the ones above: idx_sessions_user_time serves
+# user_id-only lookups as a prefix, and the BRIN index serves recorded_at range
+# scans. Dropped after the replacements are built so reads are never uncovered.
+DROP_STATEMENTS = [
+    "DROP INDEX CONCURRENTLY IF EXISTS public.idx_sessions_user_id",
+    "DROP INDEX CONCURRENTLY IF EXISTS public.idx_sessions_recorded_at",
+]
+
+INDEX_NAMES = [
+    'idx_sessions_user_time',
+    'idx_sessions_recorded_at_brin',
+    'idx_sessions_rest_user_time',
+]
+
+def deploy_session_indexes():
+    """Deploy the sessions time-series indexes to production database"""
+
+    conn = None
+    try:
+        # Initialize database configuration
+        db_config = DatabaseConfig()
+
+        # Connect to database
+        conn = psycopg2.connect(
+            host=db_config.host,
+            database=db_config.database,
+            user=db_config.user,
+            password=db_config.password,
+            port=db_config.port,
+            cursor_factory=RealDictCursor
+        )
+        conn.autocommit = True
+
+        cur = conn.cursor()
+
+        print("🚀 Deploying session indexes...")
+
+        for statement in INDEX_STATEMENTS:
+            cur.execute(statement)
+
+        # Verify the indexes (a failed CONCURRENTLY build leaves an invalid index)
+        cur.execute("""
+            SELECT c.relname AS index_name, i.indisvalid AS is_valid
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = 'public.sessions'::regclass
+              AND c.relname = ANY(%s)
+            ORDER BY c.relname;
+        """, (INDEX_NAMES,))
+        indexes = cur.fetchall()
+
+        for idx in indexes:
+            status = "✅" if idx['is_valid'] else "❌ (invalid - drop and re-run)"
+            print(f"   - {idx['index_name']} {status}")
+
+        if len(indexes) != len(INDEX_NAMES) or not all(idx['is_valid'] for idx in indexes):
+            raise RuntimeError("Session index deployment incomplete")
+
+        # Only drop the superseded indexes once their replacements are valid
+        for statement in DROP_STATEMENTS:
+            cur.execute(statement)
+        print("   - dropped idx_sessions_user_id, idx_sessions_recorded_at ✅")
+
+        print("🎉 Session index deployment completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Session index deployment failed: {e}")
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    deploy_session_indexes()
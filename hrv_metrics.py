@@ -8,11 +8,25 @@ All calculations follow established HRV analysis standards.
 """
 
 import numpy as np
-from typing import List, Dict, Optional, Union
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=64)
+def _dfa_scales(n_min: int, n_max: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Logarithmically spaced DFA box sizes and their log10 (cached per range)"""
+    # 10 geometric steps rounded to the nearest integer; truncating the float
+    # logspace would turn n_max (e.g. 63.999...) into n_max - 1
+    ratio = n_max / n_min
+    scales = np.array(sorted({int(round(n_min * ratio ** (i / 9))) for i in range(10)}), dtype=np.int64)
+    log_scales = np.log10(scales)
+    # Shared between calls, so guard against in-place modification
+    scales.flags.writeable = False
+    log_scales.flags.writeable = False
+    return scales, log_scales
+
 class HRVMetricsCalculator:
     """
     Clean HRV metrics calculator implementing the exact 9 metrics from schema.md
@@ -46,11 +60,11 @@ class HRVMetricsCalculator:
         if not rr_intervals:
             raise ValueError("RR intervals list is empty")
         
-        rr_array = np.array(rr_intervals, dtype=np.float64)
+        rr_array = np.fromiter(rr_intervals, dtype=np.float64, count=len(rr_intervals))
         
-        # Remove invalid values (NaN, inf, negative, unrealistic)
+        # Remove invalid values (NaN, inf, negative, unrealistic); the range
+        # check alone rejects NaN and ±inf since every comparison with them fails
         valid_mask = (
-            np.isfinite(rr_array) & 
             (rr_array > 200) &  # Minimum 200ms (300 BPM max)
             (rr_array < 2000)   # Maximum 2000ms (30 BPM min)
         )
@@ -64,27 +78,30 @@ class HRVMetricsCalculator:
         return rr_clean
     
     @staticmethod
-    def calculate_time_domain_metrics(rr: np.ndarray) -> Dict[str, float]:
+    def calculate_time_domain_metrics(rr: np.ndarray, mean_rr: Optional[float] = None) -> Dict[str, float]:
         """
         Calculate time-domain HRV metrics
         
         Args:
             rr: Validated RR intervals array
+            mean_rr: Precomputed mean of rr (computed here if omitted)
             
         Returns:
             Dictionary with time-domain metrics
         """
         # Basic statistics
         count_rr = len(rr)
-        mean_rr = float(np.mean(rr))
-        sdnn = float(np.std(rr, ddof=1))  # Sample standard deviation
+        if mean_rr is None:
+            mean_rr = float(np.mean(rr))
+        rr_centered = rr - mean_rr
+        sdnn = float(np.sqrt((rr_centered @ rr_centered) / (count_rr - 1)))  # Sample standard deviation
         
-        # Successive differences
+        # Successive differences (one diff array, reduced without temporaries)
         rr_diffs = np.diff(rr)
-        rmssd = float(np.sqrt(np.mean(rr_diffs**2)))
+        rmssd = float(np.sqrt((rr_diffs @ rr_diffs) / len(rr_diffs)))
         
         # pNN50: percentage of successive RR differences > 50ms
-        pnn50 = float(np.mean(np.abs(rr_diffs) > 50) * 100)
+        pnn50 = float(np.count_nonzero(np.abs(rr_diffs) > 50) / len(rr_diffs) * 100)
         
         # Coefficient of variation
         cv_rr = float((sdnn / mean_rr) * 100) if mean_rr > 0 else 0.0
@@ -103,7 +120,7 @@ class HRVMetricsCalculator:
         }
     
     @staticmethod
-    def calculate_dfa_alpha1(rr: np.ndarray) -> float:
+    def calculate_dfa_alpha1(rr: np.ndarray, mean_rr: Optional[float] = None) -> float:
         """
         Calculate DFA α1 (Detrended Fluctuation Analysis)
         
@@ -115,79 +132,87 @@ class HRVMetricsCalculator:
         
         Args:
             rr: RR intervals array
+            mean_rr: Precomputed mean of rr (computed here if omitted)
             
         Returns:
             DFA α1 value
         """
-        try:
-            # Minimum length check
-            if len(rr) < 50:
-                logger.warning(f"DFA requires ≥50 intervals, got {len(rr)}")
-                return 1.0  # Default healthy value
-            
-            # Remove mean and create cumulative sum (integration)
-            rr_centered = rr - np.mean(rr)
-            y = np.cumsum(rr_centered)
-            
-            # Define box sizes (logarithmically spaced)
-            n_min, n_max = 4, min(len(rr) // 4, 64)
-            if n_max <= n_min:
-                return 1.0
-            
-            scales = np.unique(np.logspace(np.log10(n_min), np.log10(n_max), 10).astype(int))
-            fluctuations = []
-            
-            for n in scales:
-                # Number of boxes
-                n_boxes = len(y) // n
-                if n_boxes < 2:
-                    continue
-                
-                # Reshape and detrend each box
-                y_boxes = y[:n_boxes * n].reshape(n_boxes, n)
-                x = np.arange(n)
-                
-                # Linear detrending for each box
-                box_fluctuations = []
-                for box in y_boxes:
-                    # Fit linear trend
-                    coeffs = np.polyfit(x, box, 1)
-                    trend = np.polyval(coeffs, x)
-                    
-                    # Calculate fluctuation
-                    fluctuation = np.sqrt(np.mean((box - trend)**2))
-                    box_fluctuations.append(fluctuation)
-                
-                # Average fluctuation for this scale
-                avg_fluctuation = np.mean(box_fluctuations)
-                fluctuations.append(avg_fluctuation)
-            
-            if len(fluctuations) < 3:
-                return 1.0
-            
-            # Linear regression in log-log space to find α1
-            log_scales = np.log10(scales[:len(fluctuations)])
-            log_fluctuations = np.log10(fluctuations)
-            
-            # Remove any infinite or NaN values
-            valid_mask = np.isfinite(log_scales) & np.isfinite(log_fluctuations)
-            if np.sum(valid_mask) < 3:
-                return 1.0
-            
-            # Fit line: log(F) = α1 * log(n) + c
-            alpha1 = np.polyfit(log_scales[valid_mask], log_fluctuations[valid_mask], 1)[0]
-            
-            # Clamp to physiologically reasonable range
-            alpha1 = max(0.3, min(2.0, alpha1))
+        # Minimum length check
+        if len(rr) < 50:
+            logger.warning(f"DFA requires ≥50 intervals, got {len(rr)}")
+            return 1.0  # Default healthy value
+        
+        # Non-finite input propagates into the mean, so one scalar check covers it
+        if mean_rr is None:
+            mean_rr = np.mean(rr)
+        if not np.isfinite(mean_rr):
+            logger.warning("DFA received non-finite RR intervals")
+            return 1.0
+        
+        # Remove mean and create cumulative sum (integration)
+        y = np.cumsum(rr - mean_rr)
+        
+        # Define box sizes (logarithmically spaced)
+        n_min, n_max = 4, min(len(rr) // 4, 64)
+        if n_max <= n_min:
+            return 1.0
+        
+        scales, log_scales = _dfa_scales(n_min, n_max)
+        fluctuations = []
+        
+        for n in scales:
+            # Number of boxes
+            n_boxes = len(y) // n
+            if n_boxes < 2:
+                continue
             
-            return round(float(alpha1), 4)
+            # Partition from both ends so the remainder at either end is
+            # covered (2 * n_boxes segments), then detrend each box
+            y_boxes = np.concatenate([
+                y[:n_boxes * n].reshape(n_boxes, n),
+                y[len(y) - n_boxes * n:].reshape(n_boxes, n)
+            ])
+            x_centered = np.arange(n) - (n - 1) / 2
             
-        except Exception as e:
-            logger.warning(f"DFA calculation failed: {e}")
-            return 1.0  # Default healthy value
+            # Linear detrending of all boxes at once using the closed-form
+            # least-squares fit. The residual sum of squares of each box is
+            # Σ(y - ȳ)² - (Σ(x - x̄)·(y - ȳ))² / Σ(x - x̄)², so the fitted
+            # trend never has to be materialized
+            y_centered = y_boxes - y_boxes.mean(axis=1, keepdims=True)
+            sxy = y_centered @ x_centered
+            ss_resid = np.einsum('ij,ij->i', y_centered, y_centered) - sxy * sxy / (x_centered @ x_centered)
+
+            # Fluctuation (RMS of residuals) per box, clamped against round-off
+            box_fluctuations = np.sqrt(np.maximum(ss_resid, 0.0) / n)
+
+            # Average fluctuation for this scale
+            avg_fluctuation = np.mean(box_fluctuations)
+            fluctuations.append(avg_fluctuation)
+        
+        if len(fluctuations) < 3:
+            return 1.0
+        
+        # Linear regression in log-log space to find α1
+        log_scales = log_scales[:len(fluctuations)]
+        with np.errstate(divide='ignore'):
+            log_fluctuations = np.log10(fluctuations)  # Zero fluctuation -> -inf, masked below
+        
+        # Remove any infinite or NaN values
+        valid_mask = np.isfinite(log_scales) & np.isfinite(log_fluctuations)
+        if np.sum(valid_mask) < 3:
+            return 1.0
+        
+        # Fit line: log(F) = α1 * log(n) + c (closed-form least-squares slope)
+        log_scales_centered = log_scales[valid_mask] - log_scales[valid_mask].mean()
+        alpha1 = (log_scales_centered @ log_fluctuations[valid_mask]) / (log_scales_centered @ log_scales_centered)
+        
+        # Clamp to physiologically reasonable range
+        alpha1 = max(0.3, min(2.0, alpha1))
+        
+        return round(float(alpha1), 4)
     
     @staticmethod
-    def calculate_poincare_ratio(rr: np.ndarray) -> float:
+    def calculate_poincare_ratio(rr: np.ndarray, mean_rr: Optional[float] = None) -> float:
         """
         Calculate Poincaré plot SD2/SD1 ratio
         
@@ -198,44 +223,57 @@ class HRVMetricsCalculator:
         
         Args:
             rr: RR intervals array
+            mean_rr: Precomputed mean of rr (computed here if omitted)
             
         Returns:
             SD2/SD1 ratio
         """
-        try:
-            if len(rr) < 10:
-                return 2.0  # Default ratio
-            
-            # Create Poincaré plot points: RR(n) vs RR(n+1)
-            rr1 = rr[:-1]  # RR(n)
-            rr2 = rr[1:]   # RR(n+1)
-            
-            # Calculate SD1 and SD2
-            # SD1: standard deviation perpendicular to line of identity
-            # SD2: standard deviation along line of identity
-            
-            # Differences and sums
-            diff = rr2 - rr1  # Perpendicular to line of identity
-            sum_rr = rr2 + rr1  # Along line of identity
-            
-            # Standard deviations
-            sd1 = np.std(diff, ddof=1) / np.sqrt(2)
-            sd2 = np.std(sum_rr, ddof=1) / np.sqrt(2)
-            
-            # Calculate ratio
-            if sd1 > 0:
-                ratio = sd2 / sd1
-            else:
-                ratio = 2.0  # Default if SD1 is zero
-            
-            # Clamp to reasonable range
-            ratio = max(0.5, min(10.0, ratio))
-            
-            return round(float(ratio), 2)
-            
-        except Exception as e:
-            logger.warning(f"Poincaré calculation failed: {e}")
+        if len(rr) < 10:
             return 2.0  # Default ratio
+        
+        # Non-finite input propagates into the mean, so one scalar check covers it
+        if mean_rr is None:
+            mean_rr = np.mean(rr)
+        if not np.isfinite(mean_rr):
+            logger.warning("Poincaré received non-finite RR intervals")
+            return 2.0
+        
+        # Create Poincaré plot points: RR(n) vs RR(n+1), as views of one
+        # mean-centered copy (centering keeps the moment sums well conditioned)
+        rr_centered = rr - mean_rr
+        rr1 = rr_centered[:-1]  # RR(n)
+        rr2 = rr_centered[1:]   # RR(n+1)
+        n_pairs = len(rr1)
+        
+        # Calculate SD1 and SD2
+        # SD1: standard deviation perpendicular to line of identity
+        # SD2: standard deviation along line of identity
+        
+        # Centered sums of squares / cross-products of RR(n) and RR(n+1)
+        mean1, mean2 = np.mean(rr1), np.mean(rr2)
+        s11 = rr1 @ rr1 - n_pairs * mean1 * mean1
+        s22 = rr2 @ rr2 - n_pairs * mean2 * mean2
+        s12 = rr1 @ rr2 - n_pairs * mean1 * mean2
+        
+        # Var(RR(n+1) ∓ RR(n)) = Var1 + Var2 ∓ 2·Cov, without building the
+        # difference/sum arrays
+        var_diff = max(s11 + s22 - 2 * s12, 0.0) / (n_pairs - 1)  # Perpendicular to line of identity
+        var_sum = max(s11 + s22 + 2 * s12, 0.0) / (n_pairs - 1)   # Along line of identity
+        
+        # Standard deviations
+        sd1 = np.sqrt(var_diff / 2)
+        sd2 = np.sqrt(var_sum / 2)
+        
+        # Calculate ratio (treat round-off-level SD1 as zero)
+        if var_diff > 1e-12 * (var_diff + var_sum):
+            ratio = sd2 / sd1
+        else:
+            ratio = 2.0  # Default if SD1 is zero
+        
+        # Clamp to reasonable range
+        ratio = max(0.5, min(10.0, ratio))
+        
+        return round(float(ratio), 2)
     
     @classmethod
     def calculate_all_metrics(cls, rr_intervals: List[float]) -> Dict[str, Union[int, float]]:
@@ -255,12 +293,15 @@ class HRVMetricsCalculator:
             # Validate and clean RR intervals
             rr = cls.validate_rr_intervals(rr_intervals)
             
+            # Mean RR is shared by all three passes below
+            mean_rr = float(np.mean(rr))
+            
             # Calculate time-domain metrics
-            time_metrics = cls.calculate_time_domain_metrics(rr)
+            time_metrics = cls.calculate_time_domain_metrics(rr, mean_rr)
             
             # Calculate non-linear metrics
-            defa = cls.calculate_dfa_alpha1(rr)
-            sd2_sd1 = cls.calculate_poincare_ratio(rr)
+            defa = cls.calculate_dfa_alpha1(rr, mean_rr)
+            sd2_sd1 = cls.calculate_poincare_ratio(rr, mean_rr)
             
             # Combine all metrics (exact schema.md format)
             all_metrics = {
@@ -0,0 +1,94 @@
+"""
+HRV Plots Cache
+
+In-process cache-aside layer for per-user plot listings.
+Plots only change when sessions are added or refreshed, so most dashboard
+loads can be served without re-reading the image column from the database.
+"""
+
+import copy
+import threading
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class HRVPlotsCache:
+    """
+    Caches get_user_plots results keyed by user_id
+
+    Each gunicorn worker holds its own cache, so a write handled by another
+    worker cannot invalidate it directly. Entries are therefore stored with a
+    fingerprint of the user's rows (plot count + latest updated_at) and are
+    only served while the caller's freshly queried fingerprint still matches.
+    That fingerprint query still runs on every lookup; a hit saves the image
+    payload read, not the round-trip.
+
+    Entries hold raw PNG payloads, so the cache is bounded by the total size
+    of those payloads (max_bytes) rather than by the number of users. Plots
+    are copied on the way in and out, so callers may mutate what they get
+    back without corrupting the cached entry.
+    """
+
+    def __init__(self, ttl_seconds: int = 300, max_bytes: int = 32 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: Dict[str, Tuple[Tuple[Any, ...], float, int, List[Dict[str, Any]]]] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _payload_size(plots: List[Dict[str, Any]]) -> int:
+        """Total size of the PNG payloads in a plot listing"""
+        return sum(len(plot.get('plot_image') or b'') for plot in plots)
+
+    def _pop(self, user_id: str) -> None:
+        """Remove an entry and release its bytes (lock must be held)"""
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._total_bytes -= entry[2]
+
+    def get(self, user_id: str, fingerprint: Tuple[Any, ...]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return cached plots for a user if still valid
+
+        Args:
+            user_id: User UUID
+            fingerprint: Current (plot count, max updated_at) of the user's rows
+
+        Returns:
+            Copy of the cached list of plot dictionaries, or None on miss
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            cached_fingerprint, stored_at, _, plots = entry
+            if cached_fingerprint != fingerprint or time.monotonic() - stored_at > self.ttl_seconds:
+                self._pop(user_id)
+                return None
+            logger.debug(f"Plots cache hit for user {user_id}")
+        # bytes are immutable, so deepcopy shares the PNG payloads and only
+        # duplicates the small dict/metadata structure
+        return copy.deepcopy(plots)
+
+    def set(self, user_id: str, fingerprint: Tuple[Any, ...], plots: List[Dict[str, Any]]) -> None:
+        """Store plots for a user under the given fingerprint"""
+        size = self._payload_size(plots)
+        plots = copy.deepcopy(plots)
+        with self._lock:
+            self._pop(user_id)
+            if size > self.max_bytes:
+                # A single listing larger than the whole budget is not cached
+                return
+            while self._entries and self._total_bytes + size > self.max_bytes:
+                # Evict the oldest entry (dicts keep insertion order)
+                self._pop(next(iter(self._entries)))
+            self._entries[user_id] = (fingerprint, time.monotonic(), size, plots)
+            self._total_bytes += size
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the cached plots for a user (called after writes in this worker)"""
+        with self._lock:
+            self._pop(user_id)
@@ -6,12 +6,14 @@ Implements the new architecture where plots are generated once and stored in DB.
 """
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from typing import Dict, List, Optional, Any
+import base64
 import json
 import logging
 from datetime import datetime
 from uuid import UUID
+from hrv_plots_cache import HRVPlotsCache
 
 # Note: plot_generator and app imports are done dynamically in methods to avoid circular imports
 
@@ -22,12 +24,13 @@ class HRVPlotsManager:
     
     def __init__(self, connection_pool):
         self.connection_pool = connection_pool
+        self.plots_cache = HRVPlotsCache()
     
     def upsert_plot(self, 
                    user_id: str,
                    tag: str, 
                    metric: str,
-                   plot_image_base64: str,
+                   plot_image_png: bytes,
                    plot_metadata: Dict[str, Any],
                    data_points_count: int,
                    date_range_start: Optional[datetime] = None,
@@ -39,7 +42,7 @@ class HRVPlotsManager:
             user_id: User UUID
             tag: Session tag (rest, sleep, etc.)
             metric: HRV metric name
-            plot_image_base64: Base64 encoded PNG image
+            plot_image_png: Raw PNG image bytes (stored as BYTEA)
             plot_metadata: Plot metadata including statistics
             data_points_count: Number of data points in plot
             date_range_start: Start date of data range
@@ -48,31 +51,66 @@ class HRVPlotsManager:
         Returns:
             Plot ID if successful, None if failed
         """
+        # Single-row case of the bulk upsert (one statement, one commit)
+        plot_id = self.upsert_plots_bulk(user_id, tag, [{
+            'metric': metric,
+            'plot_image_png': plot_image_png,
+            'plot_metadata': plot_metadata,
+            'data_points_count': data_points_count,
+            'date_range_start': date_range_start,
+            'date_range_end': date_range_end
+        }]).get(metric)
+        
+        if plot_id is None:
+            logger.error(f"Plot upsert returned no plot_id for user {user_id}, tag {tag}, metric {metric}")
+        else:
+            logger.info(f"Successfully upserted plot for user {user_id}, tag {tag}, metric {metric}")
+        return plot_id
+    
+    def upsert_plots_bulk(self, user_id: str, tag: str, plots: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+        """
+        Insert or update several plots for one user/tag in a single statement
+        
+        Args:
+            user_id: User UUID
+            tag: Session tag (rest, sleep, etc.)
+            plots: List of dicts with the upsert_plot arguments per metric
+                   (metric, plot_image_png, plot_metadata, data_points_count,
+                   date_range_start, date_range_end)
+            
+        Returns:
+            Dictionary mapping metric to plot ID (None for every metric if failed)
+        """
+        if not plots:
+            return {}
+        
+        conn = None
         try:
-            conn = self.connection_pool.getconn()
-            cur = conn.cursor()
+            rows = []
+            for plot in plots:
+                stats = plot['plot_metadata'].get('statistics', {})
+                rows.append((
+                    user_id, tag, plot['metric'],
+                    psycopg2.Binary(plot['plot_image_png']),
+                    json.dumps(plot['plot_metadata']),
+                    plot['data_points_count'], plot.get('date_range_start'), plot.get('date_range_end'),
+                    stats.get('mean'), stats.get('std'), stats.get('min'),
+                    stats.get('max'), stats.get('p10'), stats.get('p90')
+                ))
             
-            # Extract statistics from metadata
-            stats = plot_metadata.get('statistics', {})
-            stat_mean = stats.get('mean')
-            stat_std = stats.get('std') 
-            stat_min = stats.get('min')
-            stat_max = stats.get('max')
-            stat_p10 = stats.get('p10')
-            stat_p90 = stats.get('p90')
+            conn = self.connection_pool.getconn()
+            cur = conn.cursor(cursor_factory=RealDictCursor)
             
-            # Use direct SQL instead of function to identify exact issue
-            cur.execute("""
+            # One multi-row INSERT ... ON CONFLICT and one commit for all metrics
+            returned = execute_values(cur, """
                 INSERT INTO public.hrv_plots (
-                    user_id, tag, metric, plot_image_base64, plot_metadata,
+                    user_id, tag, metric, plot_image, plot_metadata,
                     data_points_count, date_range_start, date_range_end,
                     stat_mean, stat_std, stat_min, stat_max, stat_p10, stat_p90
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                )
+                ) VALUES %s
                 ON CONFLICT (user_id, tag, metric)
                 DO UPDATE SET
-                    plot_image_base64 = EXCLUDED.plot_image_base64,
+                    plot_image = EXCLUDED.plot_image,
                     plot_metadata = EXCLUDED.plot_metadata,
                     data_points_count = EXCLUDED.data_points_count,
                     date_range_start = EXCLUDED.date_range_start,
@@ -84,35 +122,21 @@ class HRVPlotsManager:
                     stat_p10 = EXCLUDED.stat_p10,
                     stat_p90 = EXCLUDED.stat_p90,
                     updated_at = NOW()
-                RETURNING plot_id
-            """, (
-                user_id, tag, metric, plot_image_base64, json.dumps(plot_metadata),
-                data_points_count, date_range_start, date_range_end,
-                stat_mean, stat_std, stat_min, stat_max, stat_p10, stat_p90
-            ))
-            
-            result = cur.fetchone()
-            plot_id = result[0] if result else None
-            
-            # Explicit check for silent failure
-            if plot_id is None:
-                logger.error(f"Database upsert returned NULL plot_id - silent failure detected")
-                logger.error(f"Parameters: user_id={user_id}, tag={tag}, metric={metric}")
-                logger.error(f"Data lengths: plot_data={len(plot_image_base64)}, metadata={len(json.dumps(plot_metadata))}")
-                # Check if there were any database warnings or notices
-                for notice in conn.notices:
-                    logger.error(f"Database notice: {notice}")
+                RETURNING metric, plot_id
+            """, rows, page_size=len(rows), fetch=True)
             
             conn.commit()
+            self.plots_cache.invalidate(user_id)
             
-            logger.info(f"Successfully upserted plot for user {user_id}, tag {tag}, metric {metric}")
-            return str(plot_id)
+            plot_ids = {row['metric']: str(row['plot_id']) for row in returned}
+            logger.info(f"Successfully upserted {len(plot_ids)} plots for user {user_id}, tag {tag}")
+            return plot_ids
             
         except Exception as e:
-            logger.error(f"Error upserting plot: {e}")
+            logger.error(f"Error bulk upserting plots: {e}")
             if conn:
                 conn.rollback()
-            return None
+            return {plot['metric']: None for plot in plots}
         finally:
             if conn:
                 self.connection_pool.putconn(conn)
@@ -121,16 +145,36 @@ class HRVPlotsManager:
         """
         Get all plots for a user
         
+        Every call, including cache hits, runs the COUNT/MAX(updated_at)
+        fingerprint query, because writes from other gunicorn workers cannot
+        invalidate this worker's cache. A hit saves reading and transferring the
+        image payloads, not the database round-trip.
+        
         Args:
             user_id: User UUID
             
         Returns:
             List of plot dictionaries
         """
+        conn = None
         try:
             conn = self.connection_pool.getconn()
             cur = conn.cursor(cursor_factory=RealDictCursor)
             
+            # Cheap fingerprint of the user's rows (no image data) to validate
+            # the cache against writes made by other workers
+            cur.execute("""
+                SELECT COUNT(*) AS plot_count, MAX(updated_at) AS last_updated
+                FROM public.hrv_plots
+                WHERE user_id = %s
+            """, (user_id,))
+            row = cur.fetchone()
+            fingerprint = (row['plot_count'], row['last_updated'])
+            
+            cached = self.plots_cache.get(user_id, fingerprint)
+            if cached is not None:
+                return cached
+            
             cur.execute("SELECT * FROM get_user_hrv_plots(%s)", (user_id,))
             plots = cur.fetchall()
             
@@ -138,11 +182,12 @@ class HRVPlotsManager:
             result = []
             for plot in plots:
                 plot_dict = dict(plot)
-                # Parse JSON metadata
-                if plot_dict.get('plot_metadata'):
-                    plot_dict['plot_metadata'] = json.loads(plot_dict['plot_metadata']) if isinstance(plot_dict['plot_metadata'], str) else plot_dict['plot_metadata']
+                # plot_metadata is JSONB, already decoded to a dict by psycopg2
+                # Raw PNG bytes; base64 is only applied in the HTTP response
+                plot_dict['plot_image'] = bytes(plot_dict['plot_image'])
                 result.append(plot_dict)
             
+            self.plots_cache.set(user_id, fingerprint, result)
             logger.info(f"Retrieved {len(result)} plots for user {user_id}")
             return result
             
@@ -177,9 +222,9 @@ class HRVPlotsManager:
             plot = cur.fetchone()
             if plot:
                 plot_dict = dict(plot)
-                # Parse JSON metadata
-                if plot_dict.get('plot_metadata'):
-                    plot_dict['plot_metadata'] = json.loads(plot_dict['plot_metadata']) if isinstance(plot_dict['plot_metadata'], str) else plot_dict['plot_metadata']
+                # plot_metadata is JSONB, already decoded to a dict by psycopg2
+                # Raw PNG bytes; base64 is only applied in the HTTP response
+                plot_dict['plot_image'] = bytes(plot_dict['plot_image'])
                 return plot_dict
             
             return None
@@ -214,6 +259,7 @@ class HRVPlotsManager:
             
             deleted_count = cur.rowcount
             conn.commit()
+            self.plots_cache.invalidate(user_id)
             
             logger.info(f"Deleted {deleted_count} plots for user {user_id}, tag {tag}")
             return True
@@ -259,7 +305,8 @@ class HRVPlotsManager:
                 logger.info(f"No data found for user {user_id}, tag {tag} - skipping plot generation")
                 return {metric: False for metric in metrics}
             
-            # Generate and store plot for each metric
+            # Generate plot for each metric
+            generated_plots = []
             for metric in metrics:
                 try:
                     logger.info(f"Starting plot generation for metric: {metric}")
@@ -282,26 +329,15 @@ class HRVPlotsManager:
                             except (ValueError, IndexError) as e:
                                 logger.warning(f"Failed to parse date range '{date_range}': {e}")
                         
-                        try:
-                            logger.info(f"Attempting to upsert plot for {metric}")
-                            plot_id = self.upsert_plot(
-                                user_id=user_id,
-                                tag=tag,
-                                metric=metric,
-                                plot_image_base64=plot_result['plot_data'],
-                                plot_metadata=plot_result['metadata'],
-                                data_points_count=plot_result['metadata'].get('data_points', 0),
-                                date_range_start=date_range_start,
-                                date_range_end=date_range_end
-                            )
-                            logger.info(f"Successfully upserted plot for {metric}, plot_id: {plot_id}")
-                        except Exception as upsert_error:
-                            logger.error(f"Upsert failed for {metric}: {str(upsert_error)}")
-                            results[metric] = False
-                            continue
-                        
-                        results[metric] = plot_id is not None
-                        logger.info(f"Successfully refreshed plot for {metric}, tag {tag}")
+                        # Collected here and stored in one bulk upsert below
+                        generated_plots.append({
+                            'metric': metric,
+                            'plot_image_png': base64.b64decode(plot_result['plot_data']),
+                            'plot_metadata': plot_result['metadata'],
+                            'data_points_count': plot_result['metadata'].get('data_points', 0),
+                            'date_range_start': date_range_start,
+                            'date_range_end': date_range_end
+                        })
                     else:
                         results[metric] = False
                         logger.warning(f"Failed to generate plot for {metric}, tag {tag}")
@@ -310,7 +346,13 @@ class HRVPlotsManager:
                     logger.error(f"Error refreshing plot for {metric}, tag {tag}: {e}")
                     results[metric] = False
             
-            return results
+            # Store all generated plots in a single round-trip
+            plot_ids = self.upsert_plots_bulk(user_id, tag, generated_plots)
+            for metric, plot_id in plot_ids.items():
+                results[metric] = plot_id is not None
+                logger.info(f"Refreshed plot for {metric}, tag {tag}, plot_id: {plot_id}")
+            
+            return {metric: results.get(metric, False) for metric in metrics}
             
         except Exception as e:
             logger.error(f"Error refreshing plots for user {user_id}, tag {tag}: {e}")
@@ -9,7 +9,7 @@ CREATE TABLE IF NOT EXISTS public.hrv_plots (
     metric VARCHAR(20) NOT NULL CHECK (metric IN ('mean_hr', 'mean_rr', 'count_rr', 'rmssd', 'sdnn', 'pnn50', 'cv_rr', 'defa', 'sd2_sd1')),
     
     -- Plot data and metadata
-    plot_image_base64 TEXT NOT NULL, -- Base64 encoded PNG image
+    plot_image BYTEA NOT NULL,        -- Raw PNG image bytes
     plot_metadata JSONB NOT NULL,    -- Statistics, date range, data points count
     
     -- Data summary for quick access
@@ -33,6 +33,21 @@ CREATE TABLE IF NOT EXISTS public.hrv_plots (
     UNIQUE(user_id, tag, metric)
 );
 
+-- Migrate existing base64 TEXT storage to raw BYTEA (no-op on new installs)
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = 'hrv_plots'
+          AND column_name = 'plot_image_base64'
+    ) THEN
+        ALTER TABLE public.hrv_plots ADD COLUMN IF NOT EXISTS plot_image BYTEA;
+        UPDATE public.hrv_plots SET plot_image = decode(plot_image_base64, 'base64');
+        ALTER TABLE public.hrv_plots ALTER COLUMN plot_image SET NOT NULL;
+        ALTER TABLE public.hrv_plots DROP COLUMN plot_image_base64;
+    END IF;
+END $$;
+
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_hrv_plots_user_id ON public.hrv_plots(user_id);
 CREATE INDEX IF NOT EXISTS idx_hrv_plots_tag ON public.hrv_plots(tag);
@@ -42,7 +57,12 @@ CREATE INDEX IF NOT EXISTS idx_hrv_plots_updated_at ON public.hrv_plots(updated_
 -- Row Level Security (RLS) policies
 ALTER TABLE public.hrv_plots ENABLE ROW LEVEL SECURITY;
 
--- Users can only access their own plots
+-- Users can only access their own plots (dropped first so the file can be re-run)
+DROP POLICY IF EXISTS "Users can view own plots" ON public.hrv_plots;
+DROP POLICY IF EXISTS "Users can insert own plots" ON public.hrv_plots;
+DROP POLICY IF EXISTS "Users can update own plots" ON public.hrv_plots;
+DROP POLICY IF EXISTS "Users can delete own plots" ON public.hrv_plots;
+
 CREATE POLICY "Users can view own plots" ON public.hrv_plots
     FOR SELECT USING (auth.uid() = user_id);
 
@@ -65,18 +85,23 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Trigger to automatically update updated_at
+DROP TRIGGER IF EXISTS trigger_update_hrv_plots_updated_at ON public.hrv_plots;
 CREATE TRIGGER trigger_update_hrv_plots_updated_at
     BEFORE UPDATE ON public.hrv_plots
     FOR EACH ROW
     EXECUTE FUNCTION update_hrv_plots_updated_at();
 
+-- Return/argument types changed from TEXT to BYTEA, so replace rather than overload
+DROP FUNCTION IF EXISTS get_user_hrv_plots(UUID);
+DROP FUNCTION IF EXISTS upsert_hrv_plot(UUID, VARCHAR, VARCHAR, TEXT, JSONB, INTEGER, TIMESTAMP WITH TIME ZONE, TIMESTAMP WITH TIME ZONE, NUMERIC, NUMERIC, NUMERIC, NUMERIC, NUMERIC, NUMERIC);
+
 -- Helper function to get all plots for a user
 CREATE OR REPLACE FUNCTION get_user_hrv_plots(p_user_id UUID)
 RETURNS TABLE (
     plot_id UUID,
     tag VARCHAR(50),
     metric VARCHAR(20),
-    plot_image_base64 TEXT,
+    plot_image BYTEA,
     plot_metadata JSONB,
     data_points_count INTEGER,
     date_range_start TIMESTAMP WITH TIME ZONE,
@@ -95,7 +120,7 @@ BEGIN
         hp.plot_id,
         hp.tag,
         hp.metric,
-        hp.plot_image_base64,
+        hp.plot_image,
         hp.plot_metadata,
         hp.data_points_count,
         hp.date_range_start,
@@ -118,7 +143,7 @@ CREATE OR REPLACE FUNCTION upsert_hrv_plot(
     p_user_id UUID,
     p_tag VARCHAR(50),
     p_metric VARCHAR(20),
-    p_plot_image_base64 TEXT,
+    p_plot_image BYTEA,
     p_plot_metadata JSONB,
     p_data_points_count INTEGER,
     p_date_range_start TIMESTAMP WITH TIME ZONE,
@@ -135,17 +160,17 @@ DECLARE
     result_plot_id UUID;
 BEGIN
     INSERT INTO public.hrv_plots (
-        user_id, tag, metric, plot_image_base64, plot_metadata,
+        user_id, tag, metric, plot_image, plot_metadata,
         data_points_count, date_range_start, date_range_end,
         stat_mean, stat_std, stat_min, stat_max, stat_p10, stat_p90
     ) VALUES (
-        p_user_id, p_tag, p_metric, p_plot_image_base64, p_plot_metadata,
+        p_user_id, p_tag, p_metric, p_plot_image, p_plot_metadata,
         p_data_points_count, p_date_range_start, p_date_range_end,
         p_stat_mean, p_stat_std, p_stat_min, p_stat_max, p_stat_p10, p_stat_p90
     )
     ON CONFLICT (user_id, tag, metric)
     DO UPDATE SET
-        plot_image_base64 = EXCLUDED.plot_image_base64,
+        plot_image = EXCLUDED.plot_image,
         plot_metadata = EXCLUDED.plot_metadata,
         data_points_count = EXCLUDED.data_points_count,
         date_range_start = EXCLUDED.date_range_start,
@@ -166,4 +191,4 @@ $$ LANGUAGE plpgsql SECURITY DEFINER;
 -- Grant necessary permissions
 GRANT SELECT, INSERT, UPDATE, DELETE ON public.hrv_plots TO authenticated;
 GRANT EXECUTE ON FUNCTION get_user_hrv_plots(UUID) TO authenticated;
-GRANT EXECUTE ON FUNCTION upsert_hrv_plot(UUID, VARCHAR, VARCHAR, TEXT, JSONB, INTEGER, TIMESTAMP WITH TIME ZONE, TIMESTAMP WITH TIME ZONE, NUMERIC, NUMERIC, NUMERIC, NUMERIC, NUMERIC, NUMERIC) TO authenticated;
+GRANT EXECUTE ON FUNCTION upsert_hrv_plot(UUID, VARCHAR, VARCHAR, BYTEA, JSONB, INTEGER, TIMESTAMP WITH TIME ZONE, TIMESTAMP WITH TIME ZONE, NUMERIC, NUMERIC, NUMERIC, NUMERIC, NUMERIC, NUMERIC) TO authenticated;
@@ -5,19 +5,19 @@ Generates publication-quality HRV trend analysis plots using matplotlib/seaborn.
 Handles all 9 HRV metrics with proper sleep/non-sleep aggregation logic.
 """
 
+import matplotlib
+matplotlib.use('Agg')  # Select the headless backend before pyplot is imported
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import seaborn as sns
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
 from io import BytesIO
 import base64
 from typing import List, Dict, Any, Optional, Tuple
 import logging
 
 # Configure matplotlib for server-side rendering
-plt.switch_backend('Agg')
 sns.set_style("whitegrid")
 plt.rcParams['figure.facecolor'] = 'white'
 plt.rcParams['axes.facecolor'] = 'white'
@@ -167,12 +167,17 @@ class HRVPlotGenerator:
         logger.info(f"Found {len(filtered_sessions)} sessions for tag={tag}, metric={metric}")
             
         try:
-            df = pd.DataFrame([{
-                'date': datetime.fromisoformat(s['recorded_at'].replace('Z', '+00:00')),
-                'value': float(s['hrv_metrics'][metric])  # CRITICAL FIX: Access nested metric fields
-            } for s in filtered_sessions])
+            df = pd.DataFrame({
+                # Parse all timestamps in one vectorized ISO-8601 pass
+                'date': pd.to_datetime([s['recorded_at'] for s in filtered_sessions], format='ISO8601', utc=True),
+                'value': [float(s['hrv_metrics'][metric]) for s in filtered_sessions]  # CRITICAL FIX: Access nested metric fields
+            })
             
-            return df.sort_values('date')
+            # Rows normally arrive ORDER BY recorded_at; only sort if they don't.
+            # Stable sort keeps same-timestamp sessions in query order
+            if not df['date'].is_monotonic_increasing:
+                df = df.sort_values('date', kind='mergesort', ignore_index=True)
+            return df
         except (KeyError, ValueError, TypeError) as e:
             logger.error(f"Error processing session data for {metric}: {str(e)}")
             return pd.DataFrame()
@@ -186,12 +191,15 @@ class HRVPlotGenerator:
         if not filtered_events:
             return pd.DataFrame()
             
-        df = pd.DataFrame([{
-            'date': datetime.fromisoformat(e['date'].replace('Z', '+00:00')),
-            'value': float(e[metric_key])
-        } for e in filtered_events])
+        # Event dates arrive as ISO strings or date objects (DATE() from Postgres)
+        df = pd.DataFrame({
+            'date': pd.to_datetime([e['date'] for e in filtered_events], format='ISO8601', utc=True),
+            'value': [float(e[metric_key]) for e in filtered_events]
+        })
         
-        return df.sort_values('date')
+        if not df['date'].is_monotonic_increasing:
+            df = df.sort_values('date', kind='mergesort', ignore_index=True)
+        return df
         
     def _format_plot(self, ax, config: Dict, tag: str, title_suffix: str, df_length: int = 1):
         """Apply professional mobile-friendly formatting to the plot"""
@@ -7,52 +7,59 @@ this script uses the working individual endpoints to refresh all plots.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
-import time
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 
 class HRVPlotRefresher:
-    def __init__(self, base_url: str = "https://hrv-brain-api-production.up.railway.app"):
+    def __init__(self, base_url: str = "https://hrv-brain-api-production.up.railway.app", max_workers: int = 2):
         self.base_url = base_url
         self.metrics = ['mean_hr', 'mean_rr', 'count_rr', 'rmssd', 'sdnn', 'pnn50', 'cv_rr', 'defa', 'sd2_sd1']
+        # Concurrent requests in flight; the API runs 2 gunicorn workers, so
+        # more than that only queues on the server
+        self.max_workers = max_workers
+        # One keep-alive session so TCP/TLS is set up once, not per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def _refresh_metric(self, user_id: str, tag: str, metric: str) -> Tuple[bool, str]:
+        """Refresh one metric via the working debug endpoint; returns (success, message)"""
+        try:
+            url = f"{self.base_url}/api/v1/debug/plot-test/{user_id}/{tag}/{metric}"
+            
+            response = self.session.get(url, timeout=30)
+            
+            if response.status_code == 200:
+                data = response.json()
+                if data.get('success') and len(data.get('plot_data', '')) > 0:
+                    return True, f"SUCCESS (plot size: {len(data.get('plot_data', ''))} bytes)"
+                return False, "FAILED (no plot data)"
+            return False, f"HTTP {response.status_code}"
+            
+        except Exception as e:
+            return False, f"EXCEPTION - {str(e)}"
     
     def refresh_all_plots(self, user_id: str, tag: str) -> Dict:
         """
         Refresh all HRV plots using individual working endpoints
         """
         print(f"🔄 Starting plot refresh for user {user_id}, tag {tag}")
+        print(f"📊 Processing {len(self.metrics)} metrics ({self.max_workers} at a time)...")
         
         results = {}
         successful = 0
         
-        for i, metric in enumerate(self.metrics, 1):
-            print(f"📊 Processing {metric} ({i}/{len(self.metrics)})...")
-            
-            try:
-                # Use the working debug endpoint for each metric
-                url = f"{self.base_url}/api/v1/debug/plot-test/{user_id}/{tag}/{metric}"
-                
-                response = requests.get(url, timeout=30)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('success') and len(data.get('plot_data', '')) > 0:
-                        results[metric] = True
-                        successful += 1
-                        print(f"  ✅ {metric}: SUCCESS (plot size: {len(data.get('plot_data', ''))} bytes)")
-                    else:
-                        results[metric] = False
-                        print(f"  ❌ {metric}: FAILED (no plot data)")
-                else:
-                    results[metric] = False
-                    print(f"  ❌ {metric}: HTTP {response.status_code}")
-                
-                # Small delay to avoid overwhelming the server
-                time.sleep(0.5)
-                
-            except Exception as e:
-                results[metric] = False
-                print(f"  ❌ {metric}: EXCEPTION - {str(e)}")
+        # Requests are independent, so overlap them; map() keeps metric order
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            outcomes = executor.map(lambda metric: self._refresh_metric(user_id, tag, metric), self.metrics)
+            for metric, (success, message) in zip(self.metrics, outcomes):
+                results[metric] = success
+                if success:
+                    successful += 1
+                print(f"  {'✅' if success else '❌'} {metric}: {message}")
         
         success_rate = successful / len(self.metrics)
         
@@ -80,7 +87,7 @@ class HRVPlotRefresher:
         
         try:
             url = f"{self.base_url}/api/v1/plots/user/{user_id}"
-            response = requests.get(url, timeout=30)
+            response = self.session.get(url, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -10,6 +10,12 @@ import os
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+COUNTS_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM public.sessions) AS sessions_count,
+        (SELECT COUNT(*) FROM public.hrv_plots) AS plots_count;
+"""
+
 def load_env_file():
     """Manually load environment variables from .env.railway"""
     env_vars = {}
@@ -72,16 +78,12 @@ def reset_database():
         # Check current data before deletion
         print("\n📊 Current database status:")
         
-        # Count sessions
-        cursor.execute('SELECT COUNT(*) FROM public.sessions;')
+        # Count sessions and plots in one round-trip
+        cursor.execute(COUNTS_SQL)
         result = cursor.fetchone()
-        sessions_count = result['count'] if result else 0
+        sessions_count = result['sessions_count']
+        plots_count = result['plots_count']
         print(f"   Sessions: {sessions_count}")
-        
-        # Count plots
-        cursor.execute('SELECT COUNT(*) FROM public.hrv_plots;')
-        result = cursor.fetchone()
-        plots_count = result['count'] if result else 0
         print(f"   Plots: {plots_count}")
         
         if sessions_count == 0 and plots_count == 0:
@@ -116,13 +118,10 @@ def reset_database():
         
         # Verify cleanup
         print("\n🔍 Verifying cleanup...")
-        cursor.execute('SELECT COUNT(*) FROM public.sessions;')
-        result = cursor.fetchone()
-        final_sessions = result['count'] if result else 0
-        
-        cursor.execute('SELECT COUNT(*) FROM public.hrv_plots;')
+        cursor.execute(COUNTS_SQL)
         result = cursor.fetchone()
-        final_plots = result['count'] if result else 0
+        final_sessions = result['sessions_count']
+        final_plots = result['plots_count']
         
         print(f"   Final sessions count: {final_sessions}")
         print(f"   Final plots count: {final_plots}")
@@ -0,0 +1,127 @@
+-- HRV App Unified Database Schema v4.0.0
+-- CRITICAL: Uses 'profiles' table, NOT 'users' (conflicts with auth.users)
+
+-- Enable UUID extension
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+
+-- Drop existing tables if they exist (clean slate)
+DROP TABLE IF EXISTS public.sessions CASCADE;
+DROP TABLE IF EXISTS public.profiles CASCADE;
+DROP TYPE IF EXISTS public.session_tag;
+DROP TYPE IF EXISTS public.session_status;
+
+-- ENUM types for session metadata (4-byte values, integer comparisons)
+CREATE TYPE public.session_tag AS ENUM ('rest', 'sleep', 'experiment_paired_pre', 'experiment_paired_post', 'experiment_duration', 'breath_workout');
+CREATE TYPE public.session_status AS ENUM ('pending', 'processing', 'completed', 'failed');
+
+-- PROFILES TABLE (extends Supabase auth.users)
+CREATE TABLE public.profiles (
+    -- Primary key references Supabase auth.users
+    id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+
+    -- User information (synced from auth.users)
+    email VARCHAR(255) NOT NULL,
+    display_name VARCHAR(255),
+
+    -- Profile metadata
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    -- Constraints
+    CONSTRAINT profiles_email_check CHECK (
+        position('@' in email) BETWEEN 2 AND length(email) - 4
+        AND position('.' in substring(email from position('@' in email) + 1)) > 0
+    )
+);
+
+-- SESSIONS TABLE (HRV data storage)
+CREATE TABLE public.sessions (
+    -- Core identifiers
+    session_id UUID PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+
+    -- Session metadata (UNIFIED SCHEMA)
+    tag public.session_tag NOT NULL,
+    subtag VARCHAR(100) NOT NULL,
+    event_id INTEGER NOT NULL DEFAULT 0,
+
+    -- Timing
+    duration_minutes INTEGER NOT NULL,
+    recorded_at TIMESTAMP WITH TIME ZONE NOT NULL,
+
+    -- Raw HRV data
+    rr_intervals DECIMAL[] NOT NULL,
+    rr_count INTEGER GENERATED ALWAYS AS (array_length(rr_intervals, 1)) STORED NOT NULL,
+
+    -- Processing status
+    status public.session_status DEFAULT 'pending',
+    processed_at TIMESTAMP WITH TIME ZONE,
+
+    -- Sleep-specific fields
+    sleep_event_id INTEGER,
+
+    -- Processed HRV metrics (JSON for flexibility)
+    hrv_metrics JSONB,
+
+    -- Timestamps
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    -- Constraints
+    CONSTRAINT sessions_duration_check CHECK (duration_minutes > 0 AND duration_minutes <= 60),
+    CONSTRAINT sessions_rr_count_check CHECK (rr_count > 0)
+);
+
+-- INDEXES for performance
+CREATE INDEX idx_sessions_user_time ON public.sessions(user_id, recorded_at);
+CREATE INDEX idx_sessions_tag ON public.sessions(tag);
+CREATE INDEX idx_sessions_recorded_at ON public.sessions(recorded_at);
+CREATE INDEX idx_sessions_status ON public.sessions(status);
+CREATE INDEX idx_sessions_sleep_event ON public.sessions(sleep_event_id) WHERE sleep_event_id IS NOT NULL;
+CREATE INDEX idx_sessions_sleep_events ON public.sessions(user_id, event_id DESC) WHERE tag = 'sleep' AND event_id > 0;
+CREATE INDEX idx_sessions_hrv_metrics ON public.sessions USING GIN (hrv_metrics jsonb_path_ops);
+
+-- RLS (Row Level Security) policies
+ALTER TABLE public.profiles ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.sessions ENABLE ROW LEVEL SECURITY;
+
+-- Profiles policies
+CREATE POLICY "Users can view own profile" ON public.profiles
+    FOR SELECT USING (auth.uid() = id);
+
+CREATE POLICY "Users can update own profile" ON public.profiles
+    FOR UPDATE USING (auth.uid() = id);
+
+-- Sessions policies
+CREATE POLICY "Users can view own sessions" ON public.sessions
+    FOR SELECT USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can insert own sessions" ON public.sessions
+    FOR INSERT WITH CHECK (auth.uid() = user_id);
+
+CREATE POLICY "Users can update own sessions" ON public.sessions
+    FOR UPDATE USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can delete own sessions" ON public.sessions
+    FOR DELETE USING (auth.uid() = user_id);
+
+-- Function to automatically create profile on user signup
+CREATE OR REPLACE FUNCTION public.handle_new_user()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO public.profiles (id, email, display_name)
+    VALUES (NEW.id, NEW.email, COALESCE(NEW.raw_user_meta_data->>'display_name', NEW.email));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Trigger to create profile on user signup
+DROP TRIGGER IF EXISTS on_auth_user_created ON auth.users;
+CREATE TRIGGER on_auth_user_created
+    AFTER INSERT ON auth.users
+    FOR EACH ROW EXECUTE FUNCTION public.handle_new_user();
+
+-- Grant necessary permissions
+GRANT USAGE ON SCHEMA public TO anon, authenticated;
+GRANT ALL ON public.profiles TO anon, authenticated;
+GRANT ALL ON public.sessions TO anon, authenticated;
@@ -0,0 +1,6 @@
+-- Clean slate: Drop all tables and recreate
+DROP TABLE IF EXISTS public.sessions CASCADE;
+DROP TABLE IF EXISTS public.profiles CASCADE;
+DROP FUNCTION IF EXISTS public.handle_new_user() CASCADE;
+DROP TYPE IF EXISTS public.session_tag;
+DROP TYPE IF EXISTS public.session_status;
@@ -8,6 +8,8 @@ import os
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+PLOT_FUNCTIONS = ['get_user_hrv_plots', 'upsert_hrv_plot']
+
 def load_env_file():
     """Manually load environment variables from .env.railway"""
     env_vars = {}
@@ -61,21 +63,27 @@ def test_database_connection():
         
         cur = conn.cursor()
         
-        # Test basic query
-        cur.execute("SELECT version()")
-        version = cur.fetchone()
+        # Test basic query, table and function existence in a single round-trip
+        cur.execute("""
+            SELECT version() AS version,
+                   EXISTS (
+                       SELECT 1 FROM pg_class
+                       WHERE relnamespace = 'public'::regnamespace
+                       AND relkind = 'r' AND relname = 'hrv_plots'
+                   ) AS table_exists,
+                   ARRAY(
+                       SELECT DISTINCT proname::text FROM pg_proc
+                       WHERE pronamespace = 'public'::regnamespace
+                       AND proname = ANY(%s)
+                   ) AS functions
+        """, (PLOT_FUNCTIONS,))
+        row = cur.fetchone()
         print(f"✅ Connection successful!")
-        print(f"   PostgreSQL version: {version['version'][:50]}...")
+        print(f"   PostgreSQL version: {row['version'][:50]}...")
         
         # Check if hrv_plots table exists
         print("\n📋 Checking hrv_plots table...")
-        cur.execute("""
-            SELECT table_name FROM information_schema.tables 
-            WHERE table_schema = 'public' AND table_name = 'hrv_plots'
-        """)
-        table_exists = cur.fetchone()
-        
-        if table_exists:
+        if row['table_exists']:
             print("✅ hrv_plots table exists")
             
             # Count existing plots
@@ -85,21 +93,16 @@ def test_database_connection():
             
             # Test functions
             print("\n⚙️ Testing database functions...")
-            cur.execute("""
-                SELECT routine_name FROM information_schema.routines 
-                WHERE routine_schema = 'public' 
-                AND routine_name IN ('get_user_hrv_plots', 'upsert_hrv_plot')
-            """)
-            functions = cur.fetchall()
+            functions = row['functions']
             
             for func in functions:
-                print(f"✅ Function {func['routine_name']} exists")
+                print(f"✅ Function {func} exists")
             
-            if len(functions) == 2:
+            if len(functions) == len(PLOT_FUNCTIONS):
                 print("🎉 All database components are ready!")
                 return True
             else:
-                print(f"❌ Missing functions. Found {len(functions)}/2")
+                print(f"❌ Missing functions. Found {len(functions)}/{len(PLOT_FUNCTIONS)}")
                 return False
         else:
             print("❌ hrv_plots table does not exist")
@@ -6,6 +6,10 @@ Test script to compare working debug endpoint vs failing sequential endpoint
 import requests
 import json
 
+# Shared keep-alive session: TCP/TLS to the API is set up once for all calls
+# (requests already negotiates gzip/deflate response compression)
+SESSION = requests.Session()
+
 def test_working_debug_endpoint():
     """Test the working individual debug endpoint"""
     print("🧪 Testing working debug endpoint...")
@@ -13,7 +17,7 @@ def test_working_debug_endpoint():
     url = "https://hrv-brain-api-production.up.railway.app/api/v1/debug/plot-test/7015839c-4659-4b6c-821c-2906e710a2db/rest/mean_hr"
     
     try:
-        response = requests.get(url, timeout=30)
+        response = SESSION.get(url, timeout=30)
         print(f"Status: {response.status_code}")
         
         if response.status_code == 200:
@@ -37,7 +41,7 @@ def test_failing_sequential_endpoint():
     url = "https://hrv-brain-api-production.up.railway.app/api/v1/plots/refresh-sequential/7015839c-4659-4b6c-821c-2906e710a2db/rest"
     
     try:
-        response = requests.post(url, timeout=30)
+        response = SESSION.post(url, timeout=30)
         print(f"Status: {response.status_code}")
         
         if response.status_code == 200:
@@ -60,7 +64,7 @@ def test_plot_retrieval():
     url = "https://hrv-brain-api-production.up.railway.app/api/v1/plots/user/7015839c-4659-4b6c-821c-2906e710a2db"
     
     try:
-        response = requests.get(url, timeout=30)
+        response = SESSION.get(url, timeout=30)
         print(f"Status: {response.status_code}")
         
         if response.status_code == 200:
@@ -6,6 +6,10 @@ Test single metric with hardcoded vs variable metric to isolate the issue
 import requests
 import json
 
+# Shared keep-alive session: TCP/TLS to the API is set up once for all calls
+# (requests already negotiates gzip/deflate response compression)
+SESSION = requests.Session()
+
 def test_hardcoded_metric():
     """Test with hardcoded metric (like debug endpoint)"""
     print("🧪 Testing hardcoded metric (rmssd)...")
@@ -13,7 +17,7 @@ def test_hardcoded_metric():
     url = "https://hrv-brain-api-production.up.railway.app/api/v1/debug/plot-test/7015839c-4659-4b6c-821c-2906e710a2db/rest/rmssd"
     
     try:
-        response = requests.get(url, timeout=30)
+        response = SESSION.get(url, timeout=30)
         print(f"Status: {response.status_code}")
         
         if response.status_code == 200:
@@ -36,7 +40,7 @@ def test_variable_metric():
     url = "https://hrv-brain-api-production.up.railway.app/api/v1/debug/plot-test/7015839c-4659-4b6c-821c-2906e710a2db/rest/mean_hr"
     
     try:
-        response = requests.get(url, timeout=30)
+        response = SESSION.get(url, timeout=30)
         print(f"Status: {response.status_code}")
         
         if response.status_code == 200:
@@ -59,7 +63,7 @@ def test_batch_single_metric():
     url = "https://hrv-brain-api-production.up.railway.app/api/v1/plots/refresh-simple/7015839c-4659-4b6c-821c-2906e710a2db/rest"
     
     try:
-        response = requests.post(url, timeout=30)
+        response = SESSION.post(url, timeout=30)
         print(f"Status: {response.status_code}")
         
         if response.status_code == 200: